@@ -1,85 +1,142 @@
 from autogen import AssistantAgent
 import os
+import time
 from dotenv import load_dotenv
 from utils import clean_output
+from model_router import shared_router
+from singleflight import flights, content_key, FlightCancelled
+from budget import BudgetExceeded, estimate_tokens, FULL, REDUCED, MINIMAL, EXHAUSTED
 
 load_dotenv()
 
 class ResearchAgents:
-    def __init__(self, groq_api_key):
+    def __init__(self, groq_api_key, router=None):
         self.groq_api_key = groq_api_key
-        self.llm_config = {
-            'config_list': [{
-                'model': 'deepseek-r1-distill-llama-70b',
-                'api_key': self.groq_api_key,
-                'api_type': 'groq'
-            }]
-        }
+        self.router = router if router else shared_router(self.groq_api_key)
+        self._agents = {}
 
-        self.summarizer_agent = AssistantAgent(
-            name="summarizer_agent",
-            system_message=(
+        self.system_messages = {
+            "summarize": (
                 "You are an academic summarization agent. Summarize research papers in formal IEEE style. "
                 "Use precise, objective language and passive voice. Do not include any internal thoughts, reasoning steps, or formatting tags like '<think>' or 'Summary:'. "
                 "Only output the summary of the paper in plain text."
                 "When you summarize, ensure you only add text and no numbers or bullet points. "
             ),
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-        self.quality_review_agent = AssistantAgent(
-            name="quality_review_agent",
-            system_message=(
+            "review": (
                 "Critically review the paper for quality based on clarity, originality, and methodology. "
                 "Use formal academic tone. Do not include meta-thinking, reasoning steps, or '<think>' tags. "
                 "Only present the final review analysis."
             ),
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
-
-        self.recommendation_agent = AssistantAgent(
-            name="recommendation_agent",
-            system_message=(
+            "recommend": (
                 "Suggest further reading or related research topics or papers. "
                 "Include both topic areas and example research publications with citation information when applicable. "
                 "Do not include meta-thinking, reasoning steps, or tags like '<think>'."
-            ),
-            llm_config=self.llm_config,
-            human_input_mode="NEVER",
-            code_execution_config=False
-        )
+            )
+        }
+        # Paper synthesis reuses the summarizer persona on the heavy model.
+        self.system_messages["synthesis"] = self.system_messages["summarize"]
+        self.agent_names = {
+            "summarize": "summarizer_agent",
+            "review": "quality_review_agent",
+            "recommend": "recommendation_agent",
+            "synthesis": "summarizer_agent"
+        }
 
-    def summarize_paper(self, paper_summary):
-        response = self.summarizer_agent.generate_reply(
-            messages=[{"role": "user", "content": (
-                "Provide only a plain-text IEEE-style summary of the following research paper. "
-                "Use formal, objective academic language. Write in passive voice. "
-                "Output only the summary without any explanation, notes, thoughts, or tags.\n\n" + paper_summary
-            )}]
-        )
+    def _get_agent(self, task, route, endpoint):
+        key = (route, endpoint["name"])
+        if key not in self._agents:
+            self._agents[key] = AssistantAgent(
+                name=self.agent_names[task],
+                system_message=self.system_messages[task],
+                llm_config=self.router.llm_config(route, endpoint),
+                human_input_mode="NEVER",
+                code_execution_config=False
+            )
+        return self._agents[key]
+
+    def _generate(self, task, content, budget=None, cancel=None):
+        level = budget.level() if budget else FULL
+        if level >= EXHAUSTED:
+            raise BudgetExceeded(f"No budget left for {task}")
+        # Switch to the smaller route as the budget runs low.
+        route = self.router.route_for(task, light=level >= REDUCED)
+
+        def call(endpoint):
+            return self._get_agent(task, route, endpoint).generate_reply(
+                messages=[{"role": "user", "content": content}]
+            )
+
+        prompt_tokens = estimate_tokens(self.system_messages[task]) + estimate_tokens(content)
+
+        def completion_tokens(response):
+            return estimate_tokens(response.get("content", "") if isinstance(response, dict) else response)
+
+        def run():
+            # Runs once per flight: only the owner charges the shared quota.
+            response = self.router.call(route, call)
+            if budget:
+                budget.charge_upstream(prompt_tokens + completion_tokens(response))
+            return response
+
+        start = time.monotonic()
+        # Identical task + prompt pairs from concurrent sessions share one LLM call.
+        key = ("agent", route, content_key(content))
+        response = flights.do(key, run, cancel=cancel)
+        if budget:
+            budget.record(prompt_tokens, completion_tokens(response), time.monotonic() - start)
+        return response
+
+    def summarize_paper(self, paper_summary, budget=None, cancel=None):
+        response = self._generate("summarize", (
+            "Provide only a plain-text IEEE-style summary of the following research paper. "
+            "Use formal, objective academic language. Write in passive voice. "
+            "Output only the summary without any explanation, notes, thoughts, or tags.\n\n" + paper_summary
+        ), budget=budget, cancel=cancel)
         return clean_output(response)
 
-    def review_quality(self, summary):
-        response = self.quality_review_agent.generate_reply(
-            messages=[{"role": "user", "content": (
-                "Review the quality of this paper. Use a formal academic tone. Avoid internal thoughts, reasoning steps, or '<think>' tags.\n\n" + summary
-            )}]
-        )
+    def review_quality(self, summary, budget=None, cancel=None):
+        response = self._generate("review", (
+            "Review the quality of this paper. Use a formal academic tone. Avoid internal thoughts, reasoning steps, or '<think>' tags.\n\n" + summary
+        ), budget=budget, cancel=cancel)
         return clean_output(response)
 
-    def recommend_topics(self, summary):
-        response = self.recommendation_agent.generate_reply(
-            messages=[{"role": "user", "content": (
-                "Recommend related research topics or papers based on the following summary. Do not include internal thoughts, reasoning, or '<think>' tags.\n\n" + summary
-            )}]
-        )
+    def recommend_topics(self, summary, budget=None, cancel=None):
+        response = self._generate("recommend", (
+            "Recommend related research topics or papers based on the following summary. Do not include internal thoughts, reasoning, or '<think>' tags.\n\n" + summary
+        ), budget=budget, cancel=cancel)
         return clean_output(response)
 
-    def generate_new_paper(self, combined_summaries):
+    def analyze_paper(self, paper_summary, budget=None, cancel=None):
+        """
+        Runs summary, quality review and recommendations for one paper,
+        degrading with the budget: recommendations are skipped first, then
+        the abstract is used as-is instead of an LLM summary. Setting cancel
+        stops waiting on the remaining calls.
+        """
+        level = budget.level() if budget else FULL
+        if level >= MINIMAL:
+            return {"summary": paper_summary.strip(), "quality_review": "", "recommendations": ""}
+
+        try:
+            summary = self.summarize_paper(paper_summary, budget=budget, cancel=cancel)
+        except BudgetExceeded:
+            return {"summary": paper_summary.strip(), "quality_review": "", "recommendations": ""}
+
+        quality, recs = "", ""
+        try:
+            quality = self.review_quality(summary, budget=budget, cancel=cancel)
+            if not budget or budget.level() < REDUCED:
+                recs = self.recommend_topics(summary, budget=budget, cancel=cancel)
+        except BudgetExceeded as e:
+            print(f"[ERROR] {e}")
+        except FlightCancelled:
+            raise
+        except Exception as e:
+            # Keep the summary even when review or recommendations fail.
+            print(f"[ERROR] Paper review failed: {e}")
+        return {"summary": summary, "quality_review": quality, "recommendations": recs}
+
+    def generate_new_paper(self, combined_summaries, budget=None, cancel=None):
         prompt = (
             "Based on the following summaries of recent research papers, generate a new IEEE-style research paper.\n"
             "Use standard academic English and passive voice. Include the following sections:\n"
@@ -97,10 +154,11 @@ class ResearchAgents:
             f"{combined_summaries}"
         )
         try:
-            response = self.summarizer_agent.generate_reply(
-                messages=[{"role": "user", "content": prompt}]
-            )
+            response = self._generate("synthesis", prompt, budget=budget, cancel=cancel)
             return clean_output(response)
+        except BudgetExceeded as e:
+            print(f"[ERROR] {e}")
+            return "Paper generation failed: usage budget exhausted. Please try again later."
         except Exception as e:
             print(f"[ERROR] LLM generation failed: {e}")
             return "Paper generation failed due to internal error."
\ No newline at end of file
@@ -5,8 +5,13 @@ from dotenv import load_dotenv
 from agents import ResearchAgents
 from data_loader import DataLoader
 from report_generator import ReportGenerator
+from pipeline import Pipeline
+from search_index import PaperIndex
+from budget import budgets
 import logging
-from io import BytesIO
+import multiprocessing
+import threading
+import uuid
 import warnings
 from cryptography.utils import CryptographyDeprecationWarning
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -77,7 +82,42 @@ if not groq_api_key:
 # --- Core components ---
 agents = ResearchAgents(groq_api_key)
 data_loader = DataLoader()
-report_gen = ReportGenerator()
+# Render workers are spawned, not forked from the multi-threaded server.
+report_gen = ReportGenerator(mp_context=multiprocessing.get_context("spawn"))
+library = PaperIndex(data_loader.download_dir)
+
+# --- Pipeline stages ---
+def analyze_paper(paper, budget=None, cancel=None):
+    analysis = agents.analyze_paper(paper["summary"], budget=budget, cancel=cancel)
+    paper["analysis"] = analysis["summary"]
+    paper["quality_review"] = analysis["quality_review"]
+    paper["recommendations"] = analysis["recommendations"]
+    return paper
+
+def download_paper(paper):
+    # Analysis already succeeded; download problems only cost the diagrams.
+    paper["diagrams"] = []
+    try:
+        paper["pdf_path"] = data_loader.download_pdf(paper["pdf_url"], paper["title"])
+    except Exception as e:
+        paper["warning"] = f"PDF download failed: {e}"
+        return paper
+    try:
+        paper["diagrams"] = data_loader.extract_diagrams(paper["pdf_path"])
+    except Exception as e:
+        paper["warning"] = f"Diagram extraction failed: {e}"
+    try:
+        library.add_pdf(
+            paper["pdf_path"],
+            title=paper["title"],
+            summary=paper["analysis"],
+            review=paper["quality_review"],
+            recommendations=paper["recommendations"],
+            pdf_url=paper["pdf_url"]
+        )
+    except Exception as e:
+        paper["warning"] = f"Library indexing failed: {e}"
+    return paper
 
 # --- Session state setup ---
 if "processed" not in st.session_state:
@@ -85,6 +125,9 @@ if "processed" not in st.session_state:
     st.session_state.all_summaries = []
 if "query" not in st.session_state:
     st.session_state.query = ""
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+session_budget = budgets.session(st.session_state.session_id)
 
 # --- Tabs for Navigation ---
 tabs = st.tabs(["🏠 Home", "📑 Results", "📄 Summarized Paper", "📊 Literature Survey"])
@@ -104,40 +147,82 @@ with tabs[0]:
         else:
             st.info("Search a topic to see personalized suggestions.")
 
+        usage = session_budget.totals()
+        st.caption(
+            f"Session usage: {usage['prompt_tokens'] + usage['completion_tokens']:,} tokens "
+            f"({session_budget.usage():.0%} of budget)"
+        )
+
     with st.form("search_form"):
         query = st.text_input("🔍 Enter a research topic:")
+        source = st.radio("Search in", ["arXiv", "Local library"], horizontal=True)
+        download_papers = st.checkbox("📥 Download PDFs and extract diagrams")
         submitted = st.form_submit_button("Search")
 
-    if submitted and query:
+    if submitted and query and source == "Local library":
+        st.session_state.query = query
+        library.sync()
+        matches = library.search(query)
+        st.session_state.processed = []
+        st.session_state.all_summaries = []
+        if not matches:
+            st.error("❌ No papers found in the local library.")
+        for match in matches:
+            st.success(f"📄 {match['title']}")
+            st.caption(" ".join(match["snippet"].split()))
+            if match["summary"]:
+                st.session_state.processed.append({
+                    "title": match["title"],
+                    "link": match["pdf_url"] or match["path"],
+                    "summary": match["summary"],
+                    "quality_review": match["review"] or "",
+                    "recommendations": match["recommendations"] or ""
+                })
+                st.session_state.all_summaries.append(match["summary"])
+
+    elif submitted and query:
         st.session_state.query = query
         with st.spinner("⏳ Fetching and analyzing papers..."):
-            arxiv_papers = data_loader.fetch_arxiv_papers(query)
+            st.session_state.processed = []
+            st.session_state.all_summaries = []
+
+            # Papers are analyzed as soon as they are parsed instead of
+            # waiting for the whole arXiv result set.
+            # Set when the pipeline closes (including on a Streamlit rerun),
+            # so stages stop waiting on shared arXiv and LLM work.
+            stop = threading.Event()
+            request_budget = session_budget.start_request("search")
+            stages = [("analyze", lambda paper: analyze_paper(paper, budget=request_budget, cancel=stop), 2)]
+            if download_papers:
+                stages.append(("download", download_paper))
 
-            if not arxiv_papers:
+            try:
+                papers = data_loader.stream_arxiv_papers(query, cancel=stop)
+                for paper in Pipeline(papers, stages, stop_event=stop):
+                    if "error" in paper:
+                        logger.error(f"Error: {paper['error']}")
+                        st.error(f"Processing error: {paper['error']}")
+                        continue
+
+                    st.success(f"📄 {paper['title']}")
+                    if "warning" in paper:
+                        logger.warning(paper["warning"])
+                        st.warning(f"⚠️ {paper['warning']}")
+                    st.session_state.processed.append({
+                        "title": paper["title"],
+                        "link": paper["pdf_url"],
+                        "summary": paper["analysis"],
+                        "quality_review": paper["quality_review"],
+                        "recommendations": paper["recommendations"],
+                        "diagrams": paper.get("diagrams", [])
+                    })
+                    st.session_state.all_summaries.append(paper["analysis"])
+            except Exception as e:
+                logger.error(f"Error: {e}")
+                st.error(f"Search failed: {e}")
+
+            if not st.session_state.processed:
                 st.error("❌ No papers found.")
-            else:
-                st.session_state.processed = []
-                st.session_state.all_summaries = []
-
-                for paper in arxiv_papers:
-                    try:
-                        st.success(f"📄 {paper['title']}")
-                        summary = agents.summarize_paper(paper['summary'])
-                        quality = agents.review_quality(summary)
-                        recs = agents.recommend_topics(summary)
-
-                        st.session_state.processed.append({
-                            "title": paper["title"],
-                            "link": paper["pdf_url"],
-                            "summary": summary,
-                            "quality_review": quality,
-                            "recommendations": recs,
-                            
-                        })
-                        st.session_state.all_summaries.append(summary)
-                    except Exception as e:
-                        logger.error(f"Error: {e}")
-                        st.error(f"Processing error: {e}")
 
 # --- RESULTS Tab ---
 with tabs[1]:
@@ -175,24 +260,20 @@ with tabs[2]:
             if not combined.strip():
                 st.error("❌ No summaries available.")
             else:
-                ieee = agents.generate_new_paper(combined)
+                ieee = agents.generate_new_paper(combined, budget=session_budget.start_request("generate"))
                 if "failed" in ieee.lower() or not ieee.strip():
                     ieee = "⚠️ Fallback: Failed to generate real content."
 
                 st.subheader("📄 Pdf Output")
                 st.code(ieee)
-                ieee_path = report_gen.generate_ieee_format_doc(ieee)
-                if ieee_path and os.path.exists(ieee_path):
-                    st.session_state.ieee_path = ieee_path
+                diagrams = [d for p in st.session_state.processed for d in p.get("diagrams", [])]
+                ieee_pdf = report_gen.render_ieee_pdf(ieee, diagrams=diagrams)
+                if ieee_pdf:
+                    st.session_state.ieee_pdf = ieee_pdf
                     st.success("✅ Paper generated!")
 
-        if "ieee_path" in st.session_state:
-            try:
-                with open(st.session_state.ieee_path, "rb") as f:
-                    st.download_button("📥 Download Paper", data=f, file_name="summarized_paper.pdf")
-            except Exception as e:
-                logger.error(e)
-                st.error("Download failed.")
+        if "ieee_pdf" in st.session_state:
+            st.download_button("📥 Download Paper", data=st.session_state.ieee_pdf, file_name="summarized_paper.pdf")
 
 # --- LITERATURE SURVEY TAB ---
 with tabs[3]:
@@ -221,8 +302,8 @@ with tabs[3]:
             st.download_button("📥 Download CSV", data=csv, file_name="literature_survey.csv")
 
         with col2:
-            buffer = report_gen.generate_lit_survey_pdf(df)
-            if buffer:
-                st.download_button("📥 Download PDF", data=buffer, file_name="literature_survey.pdf")
+            survey_pdf = report_gen.generate_lit_survey_pdf(df, workers=os.cpu_count() or 1)
+            if survey_pdf:
+                st.download_button("📥 Download PDF", data=survey_pdf, file_name="literature_survey.pdf")
     else:
         st.info("Please search a topic first.")
\ No newline at end of file
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Degradation levels, from no restriction to refusing further LLM work.
+FULL = 0
+REDUCED = 1
+MINIMAL = 2
+EXHAUSTED = 3
+
+
+class BudgetExceeded(Exception):
+    """Raised when a request or session has no budget left for an LLM call."""
+
+
+def estimate_tokens(text):
+    # Groq responses through AutoGen don't expose usage per call, so token
+    # counts use the usual ~4 characters per token approximation.
+    return max(1, len(str(text)) // 4) if text else 0
+
+
+class RequestBudget:
+    """Token and wall-clock accounting for one search or generation request."""
+
+    def __init__(self, session, kind, max_tokens, max_seconds):
+        self.session = session
+        self.kind = kind
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def record(self, prompt_tokens, completion_tokens, seconds):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        self.session.record(prompt_tokens, completion_tokens, seconds)
+
+    def charge_upstream(self, tokens):
+        """Counts tokens actually served upstream against the shared quota."""
+        self.session.manager.record(self.session.session_id, tokens, time.monotonic())
+
+    def usage(self):
+        """Fraction of the tightest applicable ceiling used so far."""
+        fractions = [self.session.usage()]
+        if self.max_tokens:
+            fractions.append(self.tokens / self.max_tokens)
+        if self.max_seconds:
+            fractions.append(self.elapsed() / self.max_seconds)
+        return max(fractions)
+
+    def level(self):
+        return self.session.manager.level_for(self.usage())
+
+
+class SessionBudget:
+    """Rolling token and time usage for one user session."""
+
+    def __init__(self, manager, session_id):
+        self.manager = manager
+        self.session_id = session_id
+        self.last_active = time.monotonic()
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def idle(self, now, grace):
+        """True when the rolling window is empty and nothing happened for grace seconds."""
+        with self._lock:
+            self._trim(now)
+            return not self._events and now - self.last_active >= grace
+
+    def _trim(self, now):
+        cutoff = now - self.manager.session_period
+        while self._events and self._events[0][0] < cutoff:
+            self._events.popleft()
+
+    def record(self, prompt_tokens, completion_tokens, seconds):
+        now = time.monotonic()
+        with self._lock:
+            self.last_active = now
+            self._events.append((now, prompt_tokens, completion_tokens, seconds))
+            self._trim(now)
+
+    def totals(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "prompt_tokens": sum(e[1] for e in self._events),
+                "completion_tokens": sum(e[2] for e in self._events),
+                "seconds": sum(e[3] for e in self._events)
+            }
+
+    def usage(self):
+        totals = self.totals()
+        fractions = [self.manager.contention(self.session_id)]
+        if self.manager.session_tokens:
+            fractions.append((totals["prompt_tokens"] + totals["completion_tokens"]) / self.manager.session_tokens)
+        if self.manager.session_seconds:
+            fractions.append(totals["seconds"] / self.manager.session_seconds)
+        return max(fractions)
+
+    def start_request(self, kind):
+        return RequestBudget(self, kind, self.manager.request_tokens, self.manager.request_seconds)
+
+
+class BudgetManager:
+    """
+    Process-wide budget accounting. Sessions and requests get configurable
+    token and time ceilings, and when the shared tokens-per-minute quota is
+    under contention each active session is measured against an equal
+    share of it, so heavy users degrade before light users are affected.
+    """
+
+    def __init__(self, session_tokens=200000, session_seconds=1800, session_period=3600,
+                 request_tokens=60000, request_seconds=300, tokens_per_minute=30000,
+                 reduced_at=0.7, minimal_at=0.9):
+        self.session_tokens = session_tokens
+        self.session_seconds = session_seconds
+        self.session_period = session_period
+        self.request_tokens = request_tokens
+        self.request_seconds = request_seconds
+        self.tokens_per_minute = tokens_per_minute
+        self.reduced_at = reduced_at
+        self.minimal_at = minimal_at
+        self._sessions = {}
+        self._window = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Reads ceilings from MARA_BUDGET_* variables; 0 disables a ceiling."""
+        settings = {
+            "session_tokens": "MARA_BUDGET_SESSION_TOKENS",
+            "session_seconds": "MARA_BUDGET_SESSION_SECONDS",
+            "request_tokens": "MARA_BUDGET_REQUEST_TOKENS",
+            "request_seconds": "MARA_BUDGET_REQUEST_SECONDS",
+            "tokens_per_minute": "MARA_BUDGET_TPM"
+        }
+        kwargs = {}
+        for name, env in settings.items():
+            value = os.getenv(env)
+            if value:
+                try:
+                    kwargs[name] = float(value)
+                except ValueError:
+                    print(f"[ERROR] Ignoring invalid {env}={value!r}")
+        return cls(**kwargs)
+
+    def session(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            budget = self._sessions.get(session_id)
+            if budget is None:
+                budget = self._sessions[session_id] = SessionBudget(self, session_id)
+            budget.last_active = now
+            return budget
+
+    def _evict_idle(self, now):
+        # Drop sessions with an empty rolling window. The grace period keeps
+        # a session whose request has started but not yet recorded usage.
+        grace = self.request_seconds or 300
+        for session_id in [s for s, budget in self._sessions.items() if budget.idle(now, grace)]:
+            del self._sessions[session_id]
+
+    def session_count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _trim(self, now):
+        while self._window and self._window[0][0] < now - 60:
+            self._window.popleft()
+
+    def record(self, session_id, tokens, now):
+        with self._lock:
+            self._window.append((now, session_id, tokens))
+            self._trim(now)
+
+    def contention(self, session_id):
+        """
+        Share of the per-minute quota this session has used relative to an
+        equal split between active sessions; 0 while the quota is not under
+        pressure.
+        """
+        if not self.tokens_per_minute:
+            return 0.0
+        with self._lock:
+            self._trim(time.monotonic())
+            total = sum(e[2] for e in self._window)
+            if total < self.reduced_at * self.tokens_per_minute:
+                return 0.0
+            active = {e[1] for e in self._window} | {session_id}
+            used = sum(e[2] for e in self._window if e[1] == session_id)
+        return used / (self.tokens_per_minute / len(active))
+
+    def level_for(self, usage):
+        if usage >= 1.0:
+            return EXHAUSTED
+        if usage >= self.minimal_at:
+            return MINIMAL
+        if usage >= self.reduced_at:
+            return REDUCED
+        return FULL
+
+
+# Process-wide instance shared by every Streamlit session.
+budgets = BudgetManager.from_env()
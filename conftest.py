@@ -0,0 +1 @@
+# Keeps the repository root importable for tests/.
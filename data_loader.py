@@ -2,29 +2,43 @@ import os
 import requests
 import fitz  # PyMuPDF
 import arxiv
+from singleflight import flights, normalize_query
 
 class DataLoader:
     def __init__(self, download_dir="downloads"):
         self.download_dir = download_dir
         os.makedirs(self.download_dir, exist_ok=True)
 
-    def fetch_arxiv_papers(self, query, max_results=5):
+    def fetch_arxiv_papers(self, query, max_results=5, cancel=None):
+        return list(self.stream_arxiv_papers(query, max_results, cancel=cancel))
+
+    def stream_arxiv_papers(self, query, max_results=5, cancel=None):
+        """
+        Streaming search shared across sessions: concurrent identical
+        searches read from a single arXiv iteration.
+        """
+        key = ("arxiv", normalize_query(query), max_results)
+        return flights.stream(key, self.iter_arxiv_papers, query, max_results, cancel=cancel)
+
+    def iter_arxiv_papers(self, query, max_results=5, page_size=None):
+        """
+        Yields paper records as arXiv result pages are parsed, so callers can
+        start on the first papers while later pages are still being fetched.
+        """
         print(f"Searching arXiv for query: {query}")
         search = arxiv.Search(
             query=query,
             max_results=max_results,
             sort_by=arxiv.SortCriterion.Relevance
         )
-        results = []
-        for result in search.results():
-            paper = {
+        client = arxiv.Client(page_size=page_size) if page_size else arxiv.Client()
+        for result in client.results(search):
+            yield {
                 "title": result.title,
                 "summary": result.summary,
                 "pdf_url": result.pdf_url,
                 "authors": [author.name for author in result.authors]
             }
-            results.append(paper)
-        return results
 
     def download_pdf(self, url, title):
         filename = title.replace(" ", "_") + ".pdf"
@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import time
+
+# Default routing table. Light tasks go to fast models first; the heavy
+# reasoning model is reserved for full paper synthesis, so capped routes
+# never fall back to it.
+DEFAULT_ROUTES = {
+    "summarize": {
+        "models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
+        "latency_target": 15.0,
+        "max_tokens": 1024
+    },
+    "review": {
+        "models": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+        "latency_target": 8.0,
+        "max_tokens": 768
+    },
+    "recommend": {
+        "models": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+        "latency_target": 8.0,
+        "max_tokens": 768
+    },
+    # No max_tokens: R1 spends part of its output on a <think> block, and a
+    # cap would truncate the generated paper.
+    "synthesis": {
+        "models": ["deepseek-r1-distill-llama-70b", "llama-3.3-70b-versatile"],
+        "latency_target": 90.0
+    },
+    # Smaller routes used when a session's budget is running low.
+    "summarize_light": {
+        "models": ["llama-3.1-8b-instant", "gemma2-9b-it"],
+        "latency_target": 8.0,
+        "max_tokens": 512
+    },
+    "review_light": {
+        "models": ["llama-3.1-8b-instant", "gemma2-9b-it"],
+        "latency_target": 8.0,
+        "max_tokens": 384
+    },
+    "synthesis_light": {
+        "models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
+        "latency_target": 30.0,
+        "max_tokens": 2048
+    }
+}
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = None
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.measured_at = 0.0
+
+
+class ModelRouter:
+    """
+    Maps agent tasks to an ordered list of model endpoints and fails over
+    between them based on observed latency and errors.
+
+    Each endpoint is a dict with at least a 'model' key; 'api_type',
+    'api_key' and 'base_url' are passed through to the llm_config, so a
+    local fake server can be used by pointing 'base_url' at it.
+    """
+
+    def __init__(self, routes=None, api_key=None, api_type="groq", smoothing=0.3, cooldown=30.0,
+                 timeout_factor=3.0, probe_interval=120.0):
+        self.api_key = api_key
+        self.api_type = api_type
+        self.smoothing = smoothing
+        self.cooldown = cooldown
+        self.timeout_factor = timeout_factor
+        self.probe_interval = probe_interval
+        self.routes = {}
+        for task, route in (routes or DEFAULT_ROUTES).items():
+            self.routes[task] = self._normalize_route(route)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, api_key=None):
+        """
+        Builds a router from MARA_ROUTES_FILE (a JSON file) or MARA_ROUTES
+        (inline JSON), falling back to DEFAULT_ROUTES. Per-task model lists
+        can be overridden with MARA_MODELS_<TASK>="model-a,model-b".
+        """
+        routes = json.loads(json.dumps(DEFAULT_ROUTES))
+        path = os.getenv("MARA_ROUTES_FILE")
+        inline = os.getenv("MARA_ROUTES")
+        try:
+            if path and os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    routes.update(json.load(f))
+            elif inline:
+                routes.update(json.loads(inline))
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Failed to load model routes: {e}")
+
+        for task in routes:
+            models = os.getenv(f"MARA_MODELS_{task.upper()}")
+            if models:
+                routes[task]["models"] = [m.strip() for m in models.split(",") if m.strip()]
+        return cls(routes=routes, api_key=api_key)
+
+    def _normalize_route(self, route):
+        endpoints = []
+        for entry in route.get("models", []):
+            endpoint = {"model": entry} if isinstance(entry, str) else dict(entry)
+            if "name" not in endpoint:
+                base_url = endpoint.get("base_url")
+                endpoint["name"] = f"{base_url}#{endpoint['model']}" if base_url else endpoint["model"]
+            endpoints.append(endpoint)
+        latency_target = float(route.get("latency_target", 30.0))
+        return {
+            "endpoints": endpoints,
+            "latency_target": latency_target,
+            "max_tokens": route.get("max_tokens"),
+            "timeout": float(route.get("timeout", latency_target * self.timeout_factor))
+        }
+
+    def tasks(self):
+        return list(self.routes)
+
+    def route_for(self, task, light=False):
+        """Returns the route name for a task, using its _light variant if asked and configured."""
+        if light and f"{task}_light" in self.routes:
+            return f"{task}_light"
+        return task
+
+    def llm_config(self, task, endpoint):
+        """Returns an AutoGen llm_config for a single endpoint of a task."""
+        entry = {
+            "model": endpoint["model"],
+            "api_key": endpoint.get("api_key", self.api_key),
+            "api_type": endpoint.get("api_type", self.api_type)
+        }
+        if endpoint.get("base_url"):
+            entry["base_url"] = endpoint["base_url"]
+        # Hung endpoints time out and fail over instead of blocking the task.
+        config = {"config_list": [entry], "timeout": self.routes[task]["timeout"]}
+        max_tokens = self.routes[task]["max_tokens"]
+        if max_tokens:
+            config["max_tokens"] = max_tokens
+        return config
+
+    def candidates(self, task):
+        """
+        Endpoints for a task in the order they should be tried: healthy
+        endpoints within the latency target keep their configured order,
+        slow ones follow, and endpoints cooling down after errors go last.
+        A slow endpoint whose measurement is older than probe_interval is
+        tried in its configured place again so it gets re-measured.
+        """
+        route = self.routes[task]
+        now = time.monotonic()
+        fast, slow, cooling = [], [], []
+        with self._lock:
+            for endpoint in route["endpoints"]:
+                stats = self._stats.get(endpoint["name"])
+                if stats and stats.cooldown_until > now:
+                    cooling.append(endpoint)
+                elif (stats and stats.latency is not None and stats.latency > route["latency_target"]
+                      and now - stats.measured_at < self.probe_interval):
+                    slow.append(endpoint)
+                else:
+                    fast.append(endpoint)
+        return fast + slow + cooling
+
+    def record_success(self, endpoint, elapsed):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint["name"], EndpointStats())
+            stats.calls += 1
+            stats.consecutive_failures = 0
+            stats.cooldown_until = 0.0
+            now = time.monotonic()
+            # Stale measurements are replaced rather than smoothed, so a
+            # recovered endpoint is promoted after a single good probe.
+            if stats.latency is None or now - stats.measured_at >= self.probe_interval:
+                stats.latency = elapsed
+            else:
+                stats.latency = self.smoothing * elapsed + (1 - self.smoothing) * stats.latency
+            stats.measured_at = now
+
+    def record_failure(self, endpoint):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint["name"], EndpointStats())
+            stats.calls += 1
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            backoff = self.cooldown * (2 ** (stats.consecutive_failures - 1))
+            stats.cooldown_until = time.monotonic() + min(backoff, self.cooldown * 10)
+
+    def call(self, task, fn):
+        """
+        Runs fn(endpoint) against each candidate endpoint until one returns
+        a non-empty result. Raises the last error if every endpoint fails.
+        """
+        if task not in self.routes:
+            raise KeyError(f"No route configured for task '{task}'")
+
+        last_error = None
+        for endpoint in self.candidates(task):
+            start = time.monotonic()
+            try:
+                result = fn(endpoint)
+            except Exception as e:
+                print(f"[ERROR] {task} failed on {endpoint['model']}: {e}")
+                self.record_failure(endpoint)
+                last_error = e
+                continue
+            if not result:
+                self.record_failure(endpoint)
+                last_error = RuntimeError(f"Empty response from {endpoint['model']}")
+                continue
+            self.record_success(endpoint, time.monotonic() - start)
+            return result
+        raise last_error or RuntimeError(f"No endpoints available for task '{task}'")
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "latency": s.latency,
+                    "calls": s.calls,
+                    "failures": s.failures,
+                    "cooling": s.cooldown_until > time.monotonic()
+                }
+                for name, s in self._stats.items()
+            }
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def shared_router(api_key=None):
+    """
+    Process-wide router per API key, so observed latency and cooldowns
+    survive Streamlit reruns and are shared by every session.
+    """
+    with _routers_lock:
+        if api_key not in _routers:
+            _routers[api_key] = ModelRouter.from_env(api_key=api_key)
+        return _routers[api_key]
@@ -0,0 +1,122 @@
+import queue
+import threading
+
+_DONE = object()
+
+
+class _SourceError:
+    def __init__(self, error):
+        self.error = error
+
+
+class Pipeline:
+    """
+    Streams records from a source iterable through a chain of stages
+    connected by bounded queues, so later stages run while the source is
+    still producing and memory stays bounded by the queue sizes.
+
+    Each stage is (name, fn) or (name, fn, workers); fn takes a record dict
+    and returns the (possibly updated) record. A stage failure is stored on
+    the record under 'error' and later stages pass it through untouched.
+    Records are yielded in completion order.
+
+    stop_event, if given, is the event set when the pipeline is closed;
+    stages can pass it on to cancel their own blocking calls.
+    """
+
+    def __init__(self, source, stages, queue_size=4, poll_interval=0.2, stop_event=None):
+        self.source = source
+        self.stages = [stage if len(stage) == 3 else (stage[0], stage[1], 1) for stage in stages]
+        self.poll_interval = poll_interval
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(len(self.stages) + 1)]
+        self._stop = stop_event or threading.Event()
+        self._threads = []
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=self.poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_source(self):
+        out = self._queues[0]
+        try:
+            for record in self.source:
+                if not self._put(out, record):
+                    return
+        except Exception as e:
+            self._put(out, _SourceError(e))
+        finally:
+            # Stops a generator source (e.g. a shared arXiv stream) from
+            # fetching further once the pipeline is done with it.
+            if hasattr(self.source, "close"):
+                self.source.close()
+        self._put(out, _DONE)
+
+    def _run_stage(self, index, name, fn, remaining, lock):
+        inbox, outbox = self._queues[index], self._queues[index + 1]
+        while True:
+            record = self._get(inbox)
+            if record is _DONE:
+                # Let sibling workers see the end too; the last one forwards it.
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    self._put(outbox, _DONE)
+                else:
+                    self._put(inbox, _DONE)
+                return
+            if not isinstance(record, _SourceError) and "error" not in record:
+                try:
+                    record = fn(record)
+                except Exception as e:
+                    print(f"[ERROR] Pipeline stage '{name}' failed: {e}")
+                    record["error"] = f"{name}: {e}"
+            if not self._put(outbox, record):
+                return
+
+    def start(self):
+        self._threads.append(threading.Thread(target=self._run_source, daemon=True))
+        for index, (name, fn, workers) in enumerate(self.stages):
+            remaining, lock = [workers], threading.Lock()
+            for _ in range(workers):
+                self._threads.append(threading.Thread(
+                    target=self._run_stage, args=(index, name, fn, remaining, lock), daemon=True
+                ))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    @property
+    def stop_event(self):
+        return self._stop
+
+    def close(self):
+        self._stop.set()
+
+    def __iter__(self):
+        if not self._threads:
+            self.start()
+        results = self._queues[-1]
+        try:
+            while True:
+                record = self._get(results)
+                if record is _DONE:
+                    return
+                if isinstance(record, _SourceError):
+                    raise record.error
+                yield record
+        finally:
+            self.close()
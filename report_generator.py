@@ -1,42 +1,52 @@
 from fpdf import FPDF 
 import re
 import pandas as pd
-from io import BytesIO
 import os
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import fitz  # PyMuPDF
 from PIL import Image
+from text_layout import TextLayout
+
 
 class CustomPDF(FPDF):
-    def __init__(self, title=None):
+    def __init__(self, title=None, show_title=True, page_offset=0):
         super().__init__('P', 'mm', 'A4')
         self.paper_title = title if title else "Summarized Research Paper"
-        self.header_rendered = False
+        self.header_rendered = not show_title
+        # Pages before this document when it is merged into a larger one.
+        self.page_offset = page_offset
+        self.layout = TextLayout(self)
 
     def header(self):
         if self.page_no() == 1 and not self.header_rendered:
             self.set_font("Arial", 'B', 12)
             self.set_x(10)
             max_width = 190
-            words = self.paper_title.split()
-            line = ''
-            for word in words:
-                if self.get_string_width(line + ' ' + word) > max_width:
-                    self.cell(0, 10, line.strip(), ln=True, align='C')
-                    line = word
-                else:
-                    line += ' ' + word
-            if line:
-                self.cell(0, 10, line.strip(), ln=True, align='C')
+            for line in self.layout.wrap(self.paper_title, max_width - self.layout.padding()):
+                self.cell(0, 10, line, ln=True, align='C')
             self.ln(2)
             self.header_rendered = True
 
     def footer(self):
         self.set_y(-15)
         self.set_font("Arial", 'I', 8)
-        self.cell(0, 10, f"Page {self.page_no()}", align='C')
+        self.cell(0, 10, f"Page {self.page_no() + self.page_offset}", align='C')
 
 
 class ReportGenerator:
-    def __init__(self):
+    HEADINGS = [
+        "Title", "Abstract", "Keywords", "Introduction", "Related Work", "Literature Survey",
+        "Methodology", "Experimental Results", "Discussion", "Conclusion and Future Work"
+    ]
+
+    def __init__(self, artifact_dir="outputs", min_rows_per_group=200, mp_context=None):
+        self.artifact_dir = artifact_dir
+        self.min_rows_per_group = min_rows_per_group
+        self.mp_context = mp_context
         self.figure_count = 1
         self.table_count = 1
 
@@ -74,37 +84,174 @@ class ReportGenerator:
                 pdf.image(img_path, x=25, w=160)
                 pdf.set_font("Arial", 'I', 10)
                 pdf.ln(2)
-                pdf.multi_cell(0, 10, f"Figure {self.figure_count}: {caption}", align='C')
+                pdf.layout.multi_cell(0, 10, f"Figure {self.figure_count}: {caption}", align='C')
                 pdf.ln(2)
                 self.figure_count += 1
         except Exception as e:
             print(f"[ERROR] Failed to embed image {img_path}: {e}")
 
-    def _add_table(self, pdf, table_df: pd.DataFrame):
+    def _add_table(self, pdf, table_df: pd.DataFrame, total_width=180, line_height=6):
         try:
             pdf.ln(4)
             pdf.set_font("Arial", 'B', 11)
             pdf.cell(0, 10, f"Table {self.table_count}", ln=True, align='C')
-            col_widths = [180 // len(table_df.columns)] * len(table_df.columns)
-            row_height = 8
 
-            # Header
-            for i, col in enumerate(table_df.columns):
-                pdf.cell(col_widths[i], row_height, str(col), border=1, ln=0, align='C')
-            pdf.ln()
+            header = [str(col) for col in table_df.columns]
+            rows = [[str(item) for item in row] for row in table_df.itertuples(index=False, name=None)]
 
-            # Rows
+            # Size columns from content so cells wrap instead of being cut.
+            layout = pdf.layout
+            natural = [layout.natural_width(col) for col in header]
+            minimum = [layout.longest_word(col) for col in header]
             pdf.set_font("Arial", size=10)
-            for _, row in table_df.iterrows():
+            for row in rows:
                 for i, item in enumerate(row):
-                    text = str(item)[:40]  # limit cell content length
-                    pdf.cell(col_widths[i], row_height, text, border=1, ln=0, align='C')
-                pdf.ln()
+                    natural[i] = max(natural[i], layout.natural_width(item))
+                    minimum[i] = max(minimum[i], layout.longest_word(item))
+            col_widths = layout.column_widths(natural, total_width, minimum)
+
+            def draw_row(cells, style):
+                pdf.set_font("Arial", style, 10 if not style else 11)
+                wrapped = [layout.wrap(text, w - layout.padding()) for text, w in zip(cells, col_widths)]
+                row_height = max(len(lines) for lines in wrapped) * line_height
+                if pdf.get_y() + row_height > pdf.page_break_trigger:
+                    pdf.add_page()
+                    if style == '':
+                        draw_row(header, 'B')
+                        pdf.set_font("Arial", size=10)
+                x, y = pdf.l_margin, pdf.get_y()
+                for lines, w in zip(wrapped, col_widths):
+                    pdf.rect(x, y, w, row_height)
+                    for k, line in enumerate(lines):
+                        pdf.set_xy(x, y + k * line_height)
+                        pdf.cell(w, line_height, line, align='C')
+                    x += w
+                pdf.set_xy(pdf.l_margin, y + row_height)
+
+            draw_row(header, 'B')
+            for row in rows:
+                draw_row(row, '')
             self.table_count += 1
         except Exception as e:
             print(f"[ERROR] Failed to embed table: {e}")
 
-    def generate_ieee_format_doc(self, ieee_text, diagrams=None, output_path="summarized_research_paper.pdf", tables=None):
+    def _pdf_bytes(self, pdf):
+        # PyFPDF returns a latin-1 str, fpdf2 a bytearray; hand back the
+        # underlying bytes without staging them in another buffer.
+        data = pdf.output(dest='S')
+        if isinstance(data, str):
+            return data.encode('latin-1')
+        return bytes(data)
+
+    def _emit(self, pdf, buffer=None):
+        data = self._pdf_bytes(pdf)
+        if buffer is None:
+            return data
+        buffer.write(data)
+        return buffer
+
+    def artifact_path(self, data, prefix="summarized_research_paper", session_id=None):
+        """
+        Returns a collision-free path under artifact_dir, named after the
+        session when one is given and after the content hash otherwise.
+        """
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        key = session_id if session_id else hashlib.sha256(data).hexdigest()[:16]
+        return os.path.join(self.artifact_dir, f"{prefix}_{key}.pdf")
+
+    def _write_artifact(self, data, output_path):
+        # Write to a private temp file and rename so concurrent writers
+        # never observe or clobber a half-written PDF.
+        directory = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return output_path
+
+    def render_ieee_pdf(self, ieee_text, diagrams=None, tables=None, buffer=None):
+        """
+        Renders the IEEE paper in memory. Returns the PDF bytes, or writes
+        them into the caller-supplied buffer and returns it.
+        """
+        pdf = self._build_ieee_pdf(ieee_text, diagrams=diagrams, tables=tables)
+        if pdf is None:
+            return None
+        return self._emit(pdf, buffer)
+
+    def generate_ieee_format_doc(self, ieee_text, diagrams=None, output_path=None, tables=None, session_id=None):
+        data = self.render_ieee_pdf(ieee_text, diagrams=diagrams, tables=tables)
+        if data is None:
+            return None
+        try:
+            if not output_path:
+                output_path = self.artifact_path(data, session_id=session_id)
+            return self._write_artifact(data, output_path)
+        except Exception as e:
+            print(f"[ERROR] PDF generation failed: {e}")
+            return None
+
+    def _parse_sections(self, lines):
+        """Splits cleaned paper lines into [heading, content_lines] pairs."""
+        sections = []
+        current = ["", []]
+        for line in lines:
+            line_clean = line.strip()
+            if not line_clean:
+                continue
+
+            matched_heading = next((h for h in self.HEADINGS if line_clean.lower().startswith(h.lower())), None)
+
+            if matched_heading:
+                if current[0] or current[1]:
+                    sections.append(current)
+                current = [matched_heading, []]
+                remaining = line_clean[len(matched_heading):].strip(" :-")
+                if remaining:
+                    current[1].append(remaining)
+            else:
+                current[1].append(line_clean)
+        if current[0] or current[1]:
+            sections.append(current)
+        return sections
+
+    def _section_diagrams(self, section, diagrams, inserted):
+        matches = []
+        for diagram in diagrams or []:
+            if diagram.get("section", "").lower() == section.lower():
+                img_path = diagram.get("image_path")
+                if img_path and img_path not in inserted:
+                    matches.append(diagram)
+                    inserted.add(img_path)
+        return matches
+
+    def _count_assets(self, ieee_text, diagrams=None, tables=None):
+        """
+        Returns how many figures and tables a paper will number, so batch
+        renders can continue numbering across independently rendered groups.
+        """
+        lines = self._clean_text(ieee_text).split('\n')
+        figures, table_total = 0, 0
+        inserted = set()
+        pending = set(tables or {})
+        for heading, content in self._parse_sections(lines):
+            if not content:
+                continue
+            for diagram in self._section_diagrams(heading, diagrams, inserted):
+                if os.path.exists(diagram["image_path"]):
+                    figures += 1
+            if heading in pending:
+                pending.discard(heading)
+                table_total += 1
+        return figures, table_total
+
+    def _build_ieee_pdf(self, ieee_text, diagrams=None, tables=None, page_offset=0):
         if not ieee_text.strip():
             print("[ERROR] Empty paper content.")
             return None
@@ -114,118 +261,231 @@ class ReportGenerator:
             lines = cleaned_text.split('\n')
             title = self._extract_title(lines)
 
-            pdf = CustomPDF(title=title)
+            pdf = CustomPDF(title=title, page_offset=page_offset)
             pdf.set_auto_page_break(auto=True, margin=15)
             pdf.add_page()
             pdf.set_font("Arial", size=11)
             pdf.ln(5)
 
-            headings = [
-                "Title", "Abstract", "Keywords", "Introduction", "Related Work", "Literature Survey",
-                "Methodology", "Experimental Results", "Discussion", "Conclusion and Future Work"
-            ]
-
-            current_section = ""
-            content_buffer = []
             inserted_diagrams = set()
             tables = tables.copy() if tables else {}
+            sections = self._parse_sections(lines)
 
-            for line in lines:
-                line_clean = line.strip()
-                if not line_clean:
-                    continue
-
-                matched_heading = next((h for h in headings if line_clean.lower().startswith(h.lower())), None)
-
-                if matched_heading:
-                    # Write previous section's content
-                    if content_buffer:
-                        pdf.set_font("Arial", size=11)
-                        pdf.multi_cell(0, 10, '\n'.join(content_buffer), align='J')
-                        pdf.ln(4)
-
-                        # Insert diagrams
-                        if diagrams:
-                            for diagram in diagrams:
-                                if diagram.get("section", "").lower() == current_section.lower():
-                                    img_path = diagram.get("image_path")
-                                    if img_path and img_path not in inserted_diagrams:
-                                        self._add_diagram(pdf, diagram)
-                                        inserted_diagrams.add(img_path)
-
-                        # Insert tables
-                        if current_section in tables:
-                            self._add_table(pdf, tables[current_section])
-                            del tables[current_section]
-
-                        content_buffer = []
-
-                    # New section heading
+            for i, (heading, content) in enumerate(sections):
+                if heading:
                     pdf.set_font("Arial", 'B', 12)
-                    pdf.cell(0, 10, matched_heading, ln=True)
+                    pdf.cell(0, 10, heading, ln=True)
                     pdf.ln(2)
 
-                    current_section = matched_heading
-                    remaining = line_clean[len(matched_heading):].strip(" :-")
-                    if remaining:
-                        content_buffer.append(remaining)
-                else:
-                    content_buffer.append(line_clean)
+                if not content:
+                    continue
 
-            # Final section buffer
-            if content_buffer:
                 pdf.set_font("Arial", size=11)
-                pdf.multi_cell(0, 10, '\n'.join(content_buffer), align='J')
+                pdf.multi_cell(0, 10, '\n'.join(content), align='J')
+                if i < len(sections) - 1:
+                    pdf.ln(4)
 
-                if diagrams:
-                    for diagram in diagrams:
-                        if diagram.get("section", "").lower() == current_section.lower():
-                            img_path = diagram.get("image_path")
-                            if img_path and img_path not in inserted_diagrams:
-                                self._add_diagram(pdf, diagram)
-                                inserted_diagrams.add(img_path)
+                for diagram in self._section_diagrams(heading, diagrams, inserted_diagrams):
+                    self._add_diagram(pdf, diagram)
 
-                if current_section in tables:
-                    self._add_table(pdf, tables[current_section])
+                if heading in tables:
+                    self._add_table(pdf, tables.pop(heading))
 
-            pdf.output(output_path, 'F')
-            return output_path
+            return pdf
 
         except Exception as e:
             print(f"[ERROR] PDF generation failed: {e}")
             return None
 
-    def generate_lit_survey_pdf(self, df):
+    def render_ieee_batch(self, papers, buffer=None, workers=1):
+        """
+        Renders a batch of per-paper reports into one PDF. Each paper is an
+        IEEE text string or a dict with 'text' and optional 'diagrams' and
+        'tables'. With workers > 1 the papers render in a process pool;
+        figure, table and page numbering continue across papers.
+        """
+        jobs = []
+        figure_start, table_start = self.figure_count, self.table_count
+        for paper in papers:
+            if isinstance(paper, str):
+                paper = {"text": paper}
+            if not paper.get("text", "").strip():
+                continue
+            jobs.append((paper["text"], paper.get("diagrams"), paper.get("tables"), figure_start, table_start))
+            figures, table_total = self._count_assets(paper["text"], paper.get("diagrams"), paper.get("tables"))
+            figure_start += figures
+            table_start += table_total
+
+        if not jobs:
+            print("[ERROR] Empty paper content.")
+            return None
+
         try:
-            pdf = CustomPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.add_page()
+            data = self._render_groups(_count_ieee_group, _render_ieee_group, jobs, workers)
+            if data is None:
+                return None
+            self.figure_count, self.table_count = figure_start, table_start
+        except Exception as e:
+            print(f"[ERROR] Batch PDF generation failed: {e}")
+            return None
+        if buffer is None:
+            return data
+        buffer.write(data)
+        return buffer
+
+    def _render_survey_rows(self, columns, rows, first_group=True, page_offset=0):
+        pdf = CustomPDF(show_title=first_group, page_offset=page_offset)
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+        if first_group:
             pdf.set_font("Arial", size=12)
             pdf.cell(200, 10, txt="Literature Survey Table", ln=True, align='C')
             pdf.ln(10)
 
-            for index, row in df.iterrows():
-                pdf.set_font("Arial", 'B', 12)
-                pdf.multi_cell(0, 10, self._clean_text(f"{index+1}. {row['Paper Title']}"))
+        for number, values in rows:
+            pdf.set_font("Arial", 'B', 12)
+            pdf.layout.multi_cell(0, 10, self._clean_text(f"{number}. {values[0]}"))
+            pdf.set_font("Arial", size=11)
+            for col, value in zip(columns[1:], values[1:]):
+                content = self._format_bullet_points(value) if isinstance(value, str) else str(value)
+                pdf.set_font("Arial", 'B', 11)
+                pdf.layout.multi_cell(0, 10, f"{col}:")
                 pdf.set_font("Arial", size=11)
-                for col in df.columns[1:]:
-                    content = self._format_bullet_points(str(row[col])) if isinstance(row[col], str) else str(row[col])
-                    pdf.set_font("Arial", 'B', 11)
-                    pdf.multi_cell(0, 10, f"{col}:")
-                    pdf.set_font("Arial", size=11)
-                    pdf.multi_cell(0, 10, content)
-                pdf.ln(5)
-
-            buffer = BytesIO()
-            pdf_bytes = pdf.output(dest='S').encode('latin-1')
-            buffer.write(pdf_bytes)
-            buffer.seek(0)
+                pdf.layout.multi_cell(0, 10, content)
+            pdf.ln(5)
+        return pdf
+
+    def generate_lit_survey_pdf(self, df, buffer=None, workers=1):
+        """
+        Renders the literature survey. Returns the PDF bytes, or writes them
+        into the caller-supplied buffer and returns it. With workers > 1,
+        large surveys are split into page groups rendered in a process pool.
+        """
+        try:
+            columns = list(df.columns)
+            # Paper Title leads each entry, whatever the column order.
+            order = [columns.index("Paper Title")] + [i for i, c in enumerate(columns) if c != "Paper Title"]
+            columns = [columns[i] for i in order]
+            rows = [
+                (index + 1, [values[i] for i in order])
+                for index, values in zip(df.index, df.itertuples(index=False, name=None))
+            ]
+
+            groups = min(workers, max(1, len(rows) // self.min_rows_per_group))
+            if groups <= 1:
+                pdf = self._render_survey_rows(columns, rows)
+                return self._emit(pdf, buffer)
+
+            size = -(-len(rows) // groups)
+            jobs = [
+                (columns, rows[start:start + size], start == 0)
+                for start in range(0, len(rows), size)
+            ]
+            data = self._render_groups(_count_survey_group, _render_survey_group, jobs, workers)
+            if buffer is None:
+                return data
+            buffer.write(data)
             return buffer
 
         except Exception as e:
             print(f"[ERROR] Literature Survey PDF generation failed: {e}")
             return None
 
-def generate_pdf_from_text(text, output_path="summarized_research_paper.pdf", diagrams=None, tables=None):
+    def _run_groups(self, worker, jobs, workers):
+        if workers > 1 and len(jobs) > 1:
+            pool = _get_pool(workers, self.mp_context)
+            try:
+                return list(pool.map(worker, jobs))
+            except BrokenProcessPool:
+                _drop_pool(workers, self.mp_context)
+                raise
+        return [worker(job) for job in jobs]
+
+    def _render_groups(self, count_worker, render_worker, jobs, workers):
+        """
+        Renders page groups in two parallel passes: the first lays each group
+        out to count its pages, the second renders it with the page offset
+        of everything before it, so footers come out numbered by fpdf itself.
+        """
+        counts = self._run_groups(count_worker, jobs, workers)
+        if any(count is None for count in counts):
+            return None
+        offsets, total = [], 0
+        for count in counts:
+            offsets.append(total)
+            total += count
+        parts = self._run_groups(render_worker, [job + (offset,) for job, offset in zip(jobs, offsets)], workers)
+        if any(part is None for part in parts):
+            return None
+        return self._merge_pdfs(parts)
+
+    def _merge_pdfs(self, parts):
+        """Concatenates rendered page groups; their streams are already compressed."""
+        merged = fitz.open()
+        try:
+            for data in parts:
+                with fitz.open(stream=data, filetype="pdf") as part:
+                    merged.insert_pdf(part)
+            return merged.tobytes()
+        finally:
+            merged.close()
+
+
+# Render pools are created once per size and start method and reused, so
+# worker start-up is not paid on every render.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(workers, mp_context):
+    return workers, mp_context.get_start_method() if mp_context else None
+
+
+def _get_pool(workers, mp_context=None):
+    key = _pool_key(workers, mp_context)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+        return pool
+
+
+def _drop_pool(workers, mp_context=None):
+    with _pools_lock:
+        pool = _pools.pop(_pool_key(workers, mp_context), None)
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def _build_ieee_group(job, page_offset=0):
+    text, diagrams, tables, figure_start, table_start = job[:5]
+    generator = ReportGenerator()
+    generator.figure_count, generator.table_count = figure_start, table_start
+    return generator, generator._build_ieee_pdf(text, diagrams=diagrams, tables=tables, page_offset=page_offset)
+
+
+def _count_ieee_group(job):
+    _, pdf = _build_ieee_group(job)
+    return pdf.page_no() if pdf else None
+
+
+def _render_ieee_group(job):
+    generator, pdf = _build_ieee_group(job, page_offset=job[5])
+    return generator._pdf_bytes(pdf) if pdf else None
+
+
+def _count_survey_group(job):
+    columns, rows, first_group = job[:3]
+    return ReportGenerator()._render_survey_rows(columns, rows, first_group=first_group).page_no()
+
+
+def _render_survey_group(job):
+    columns, rows, first_group, page_offset = job
+    generator = ReportGenerator()
+    pdf = generator._render_survey_rows(columns, rows, first_group=first_group, page_offset=page_offset)
+    return generator._pdf_bytes(pdf)
+
+
+def generate_pdf_from_text(text, output_path=None, diagrams=None, tables=None):
     generator = ReportGenerator()
     return generator.generate_ieee_format_doc(text, diagrams=diagrams, tables=tables, output_path=output_path)
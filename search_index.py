@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import fitz  # PyMuPDF
+
+
+class PaperIndex:
+    """
+    SQLite FTS5 full-text index over PDFs in the download directory.
+
+    Each document stores its extracted text alongside the generated summary,
+    quality review and recommendations. Files are indexed one at a time and
+    only re-extracted when their size or modification time changes.
+    """
+
+    def __init__(self, download_dir="downloads", db_name="library.db"):
+        self.download_dir = download_dir
+        os.makedirs(self.download_dir, exist_ok=True)
+        self.db_path = os.path.join(self.download_dir, db_name)
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    mtime REAL,
+                    size INTEGER,
+                    title TEXT,
+                    pdf_url TEXT,
+                    summary TEXT,
+                    review TEXT,
+                    recommendations TEXT,
+                    indexed_at REAL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                    title, summary, review, body, tokenize='porter unicode61'
+                );
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _extract_text(self, pdf_path):
+        with fitz.open(pdf_path) as doc:
+            return "\n".join(page.get_text() for page in doc)
+
+    @contextmanager
+    def _write(self):
+        # BEGIN IMMEDIATE takes SQLite's write lock up front, so writers from
+        # other PaperIndex instances, threads or processes queue on the
+        # database instead of racing between a read and the insert.
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def add_pdf(self, pdf_path, title=None, summary=None, review=None, recommendations=None, pdf_url=None):
+        """
+        Indexes a single PDF, or refreshes its stored analysis. Text is only
+        re-extracted when the file has changed since it was last indexed.
+        Returns the document id, or None if the file could not be indexed.
+        """
+        path = os.path.abspath(pdf_path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            print(f"[ERROR] Cannot index {pdf_path}: {e}")
+            return None
+
+        def unchanged(row):
+            return row is not None and row["mtime"] == stat.st_mtime and row["size"] == stat.st_size
+
+        # Extraction is slow, so it happens before taking the write lock.
+        with self._connect() as conn:
+            row = conn.execute("SELECT mtime, size FROM documents WHERE path = ?", (path,)).fetchone()
+        body = None
+        if not unchanged(row):
+            try:
+                body = self._extract_text(path)
+            except Exception as e:
+                print(f"[ERROR] Text extraction failed for {pdf_path}: {e}")
+                return None
+
+        with self._write() as conn:
+            row = conn.execute("SELECT * FROM documents WHERE path = ?", (path,)).fetchone()
+            fields = {
+                "title": title,
+                "pdf_url": pdf_url,
+                "summary": summary,
+                "review": review,
+                "recommendations": recommendations
+            }
+            if row is not None:
+                # Keep previously stored values for anything not supplied.
+                fields = {k: v if v is not None else row[k] for k, v in fields.items()}
+                if unchanged(row) and all(fields[k] == row[k] for k in fields):
+                    return row["id"]
+            if fields["title"] is None:
+                fields["title"] = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+            if body is None:
+                if unchanged(row):
+                    body = conn.execute("SELECT body FROM documents_fts WHERE rowid = ?", (row["id"],)).fetchone()[0]
+                else:
+                    # Another writer replaced the entry after our first read.
+                    try:
+                        body = self._extract_text(path)
+                    except Exception as e:
+                        print(f"[ERROR] Text extraction failed for {pdf_path}: {e}")
+                        return None
+
+            conn.execute(
+                "INSERT INTO documents (path, mtime, size, title, pdf_url, summary, review, recommendations, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET mtime = excluded.mtime, size = excluded.size, "
+                "title = excluded.title, pdf_url = excluded.pdf_url, summary = excluded.summary, "
+                "review = excluded.review, recommendations = excluded.recommendations, indexed_at = excluded.indexed_at",
+                (path, stat.st_mtime, stat.st_size, fields["title"], fields["pdf_url"], fields["summary"],
+                 fields["review"], fields["recommendations"], time.time())
+            )
+            doc_id = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()[0]
+            conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+            conn.execute(
+                "INSERT INTO documents_fts (rowid, title, summary, review, body) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, fields["title"], fields["summary"] or "", fields["review"] or "", body)
+            )
+            return doc_id
+
+    def sync(self):
+        """Indexes new or modified PDFs in the download directory and drops deleted ones."""
+        with self._connect() as conn:
+            known = {row["path"]: (row["mtime"], row["size"]) for row in conn.execute("SELECT path, mtime, size FROM documents")}
+
+        seen = set()
+        indexed = 0
+        for entry in os.scandir(self.download_dir):
+            if not entry.is_file() or not entry.name.lower().endswith(".pdf"):
+                continue
+            path = os.path.abspath(entry.path)
+            seen.add(path)
+            stat = entry.stat()
+            if known.get(path) != (stat.st_mtime, stat.st_size):
+                if self.add_pdf(path) is not None:
+                    indexed += 1
+
+        missing = [path for path in known if path not in seen and not os.path.exists(path)]
+        if missing:
+            with self._write() as conn:
+                for path in missing:
+                    row = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+                    if row:
+                        conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row["id"],))
+                        conn.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+        return indexed
+
+    def _match_expression(self, query):
+        # Quote each term so user input can't break FTS5 query syntax.
+        terms = [term.replace('"', '""') for term in query.split()]
+        return " ".join(f'"{term}"' for term in terms if term)
+
+    def search(self, query, limit=10):
+        """
+        Ranked full-text search over titles, stored analyses and paper text.
+        Title and summary matches weigh more than body matches.
+        """
+        expression = self._match_expression(query)
+        if not expression:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT d.id, d.path, d.title, d.pdf_url, d.summary, d.review, d.recommendations,
+                       snippet(documents_fts, 3, '**', '**', ' ... ', 24) AS snippet,
+                       bm25(documents_fts, 10.0, 4.0, 2.0, 1.0) AS score
+                FROM documents_fts
+                JOIN documents d ON d.id = documents_fts.rowid
+                WHERE documents_fts MATCH ?
+                ORDER BY score
+                LIMIT ?
+            ''', (expression, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
@@ -0,0 +1,218 @@
+import hashlib
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class FlightCancelled(Exception):
+    """Raised to a caller that stopped waiting; the shared work keeps running."""
+
+
+class _Broadcast:
+    """
+    Items produced by one shared iterator for its attached subscribers.
+
+    Only items some subscriber has not read yet are kept, and the producer
+    blocks once it is buffer_size items ahead of the slowest subscriber.
+    When the last subscriber detaches, the producer stops.
+    """
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self.items = deque()
+        self.base = 0
+        self.produced = 0
+        self.positions = {}
+        self.done = False
+        self.closed = False
+        self.error = None
+        self.cond = threading.Condition()
+        self._next_id = 0
+
+    def joinable(self):
+        # Late callers can only attach while nothing has been discarded.
+        with self.cond:
+            return self.base == 0 and not self.closed
+
+    def attach(self):
+        with self.cond:
+            subscriber = self._next_id
+            self._next_id += 1
+            self.positions[subscriber] = self.base
+            return subscriber
+
+    def detach(self, subscriber):
+        with self.cond:
+            if self.positions.pop(subscriber, None) is None:
+                return
+            if not self.positions and not self.done:
+                self.closed = True
+            self._trim()
+            self.cond.notify_all()
+
+    def _trim(self):
+        low = min(self.positions.values(), default=self.produced)
+        while self.base < low and self.items:
+            self.items.popleft()
+            self.base += 1
+
+    def lag(self):
+        return self.produced - min(self.positions.values(), default=self.produced)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one computation.
+
+    The work runs on a shared pool rather than in the first caller's
+    thread, so any caller (including the first) can cancel or time out
+    without affecting the others. Results are not cached once the
+    computation finishes; the next call for the key starts fresh.
+    """
+
+    def __init__(self, max_workers=32, max_streams=8, buffer_size=8, poll_interval=0.2):
+        """
+        At most max_workers distinct calls and max_streams distinct streams
+        run at once; further unique work queues until a slot frees up. The
+        pools are separate so long-running stream producers cannot starve
+        LLM calls.
+        """
+        self.poll_interval = poll_interval
+        self.buffer_size = buffer_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="singleflight")
+        self._stream_executor = ThreadPoolExecutor(max_workers=max_streams, thread_name_prefix="singleflight-stream")
+        self._inflight = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Returns the in-flight future for key, starting fn if there is none."""
+        with self._lock:
+            future = self._inflight.get(key)
+            created = future is None
+            if created:
+                future = self._executor.submit(fn, *args, **kwargs)
+                self._inflight[key] = future
+        # Registered outside the lock: a finished future runs the callback
+        # immediately, and _forget takes the lock itself.
+        if created:
+            future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def do(self, key, fn, *args, cancel=None, timeout=None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) once per in-flight key and returns its result
+        to every caller. A caller stops waiting when its cancel event is set
+        or its timeout elapses, raising FlightCancelled.
+        """
+        future = self.submit(key, fn, *args, **kwargs)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            wait = self.poll_interval if cancel is not None else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise FlightCancelled(f"Timed out waiting for {key!r}")
+                wait = remaining if wait is None else min(wait, remaining)
+            try:
+                return future.result(timeout=wait)
+            except FutureTimeoutError:
+                if cancel is not None and cancel.is_set():
+                    raise FlightCancelled(f"Cancelled waiting for {key!r}")
+
+    def _produce(self, key, broadcast, factory, args, kwargs):
+        iterator = None
+        try:
+            iterator = iter(factory(*args, **kwargs))
+            for item in iterator:
+                with broadcast.cond:
+                    while not broadcast.closed and broadcast.lag() >= broadcast.buffer_size:
+                        broadcast.cond.wait(timeout=self.poll_interval)
+                    if broadcast.closed:
+                        break
+                    broadcast.items.append(item)
+                    broadcast.produced += 1
+                    broadcast.cond.notify_all()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+            with self._lock:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+            with broadcast.cond:
+                broadcast.done = True
+                broadcast.cond.notify_all()
+
+    def _subscribe(self, key, broadcast, subscriber, cancel):
+        position = broadcast.base
+        try:
+            while True:
+                with broadcast.cond:
+                    while position >= broadcast.produced and not broadcast.done:
+                        if cancel is not None and cancel.is_set():
+                            raise FlightCancelled(f"Cancelled waiting for {key!r}")
+                        broadcast.cond.wait(timeout=self.poll_interval)
+                    if position >= broadcast.produced:
+                        if broadcast.error is not None:
+                            raise broadcast.error
+                        return
+                    item = broadcast.items[position - broadcast.base]
+                    position += 1
+                    broadcast.positions[subscriber] = position
+                    broadcast._trim()
+                    broadcast.cond.notify_all()
+                yield dict(item) if isinstance(item, dict) else item
+        finally:
+            broadcast.detach(subscriber)
+
+    def stream(self, key, factory, *args, cancel=None, **kwargs):
+        """
+        Iterates factory(*args, **kwargs) once per in-flight key and yields
+        its items to every concurrent caller. The shared producer runs at
+        most buffer_size items ahead of the slowest caller, and stops once
+        every caller has detached. Callers arriving after items were already
+        consumed start a fresh stream. Dict items are copied per caller so
+        downstream stages can update them independently.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            created = broadcast is None or not broadcast.joinable()
+            if created:
+                broadcast = self._streams[key] = _Broadcast(self.buffer_size)
+            subscriber = broadcast.attach()
+        if created:
+            self._stream_executor.submit(self._produce, key, broadcast, factory, args, kwargs)
+
+        subscription = self._subscribe(key, broadcast, subscriber, cancel)
+        # An abandoned, never-started subscription must still detach.
+        weakref.finalize(subscription, broadcast.detach, subscriber)
+        return subscription
+
+    def inflight(self):
+        with self._lock:
+            return len(self._inflight) + len(self._streams)
+
+
+def normalize_query(query):
+    return " ".join(str(query).lower().split())
+
+
+def content_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Process-wide instance shared by every Streamlit session.
+flights = SingleFlight()
@@ -0,0 +1,37 @@
+import time
+
+from budget import BudgetManager, FULL, EXHAUSTED
+
+
+def test_session_attribution_does_not_charge_shared_quota():
+    manager = BudgetManager(tokens_per_minute=1000, request_tokens=0, request_seconds=0)
+    owner = manager.session("owner").start_request("search")
+    follower = manager.session("follower").start_request("search")
+
+    # One upstream call of 600 tokens shared by two sessions.
+    owner.charge_upstream(600)
+    owner.record(300, 300, 1.0)
+    follower.record(300, 300, 1.0)
+
+    assert manager.contention("follower") == 0.0
+    assert manager.session("follower").totals()["prompt_tokens"] == 300
+
+
+def test_heavy_session_degrades_before_light_one():
+    manager = BudgetManager(tokens_per_minute=1000, request_tokens=0, request_seconds=0)
+    heavy = manager.session("heavy").start_request("search")
+    light = manager.session("light").start_request("search")
+    heavy.charge_upstream(800)
+    light.charge_upstream(10)
+    assert heavy.level() == EXHAUSTED
+    assert light.level() == FULL
+
+
+def test_idle_sessions_are_evicted():
+    manager = BudgetManager(session_period=0.05, request_seconds=0.05)
+    manager.session("gone").start_request("search").record(10, 10, 0.1)
+    assert manager.session_count() == 1
+
+    time.sleep(0.1)
+    manager.session("new")
+    assert manager.session_count() == 1
@@ -0,0 +1,45 @@
+import time
+
+from model_router import ModelRouter
+
+
+def make_router(**kwargs):
+    routes = {"task": {"models": ["a", "b"], "latency_target": 0.05}}
+    return ModelRouter(routes=routes, **kwargs)
+
+
+def test_fails_over_and_cools_down_erroring_endpoint():
+    router = make_router(cooldown=60)
+
+    def call(endpoint):
+        if endpoint["model"] == "a":
+            raise ConnectionError("down")
+        return "from-b"
+
+    assert router.call("task", call) == "from-b"
+    assert [e["model"] for e in router.candidates("task")] == ["b", "a"]
+
+
+def test_slow_endpoint_is_probed_again_after_interval():
+    router = make_router(probe_interval=0.1)
+    router.call("task", lambda endpoint: time.sleep(0.08) or "slow")
+    assert [e["model"] for e in router.candidates("task")] == ["b", "a"]
+
+    time.sleep(0.12)
+    assert [e["model"] for e in router.candidates("task")] == ["a", "b"]
+    router.call("task", lambda endpoint: "fast")
+    assert [e["model"] for e in router.candidates("task")] == ["a", "b"]
+
+
+def test_llm_config_carries_timeout_from_latency_target():
+    router = make_router(timeout_factor=4.0)
+    endpoint = router.candidates("task")[0]
+    assert router.llm_config("task", endpoint)["timeout"] == 0.2
+
+
+def test_reasoning_model_only_on_uncapped_routes():
+    router = ModelRouter(api_key="k")
+    assert "max_tokens" not in router.llm_config("synthesis", router.routes["synthesis"]["endpoints"][0])
+    for task, route in router.routes.items():
+        if route["max_tokens"]:
+            assert all("deepseek-r1" not in e["model"] for e in route["endpoints"]), task
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from pipeline import Pipeline
+from singleflight import SingleFlight
+
+
+def test_slow_consumer_bounds_source_reads():
+    flight = SingleFlight(buffer_size=2, poll_interval=0.01)
+    produced = []
+
+    def produce():
+        for i in range(1000):
+            produced.append(i)
+            yield {"i": i}
+
+    pipeline = Pipeline(flight.stream("q", produce), [("pass", lambda r: r)], queue_size=2, poll_interval=0.01)
+    seen = []
+    for record in pipeline:
+        seen.append(record["i"])
+        time.sleep(0.02)
+        if len(seen) == 5:
+            break
+    time.sleep(0.2)
+    # Bounded by the stream buffer plus the pipeline queues, not by the source.
+    assert len(produced) < 20
+    assert pipeline.stop_event.is_set()
+    assert flight.inflight() == 0
+
+
+def test_stage_errors_are_recorded_and_skip_later_stages():
+    later = []
+
+    def check(record):
+        if record["i"] == 1:
+            raise ValueError("bad record")
+        return record
+
+    def mark(record):
+        later.append(record["i"])
+        return record
+
+    records = list(Pipeline(({"i": i} for i in range(3)), [("check", check, 2), ("mark", mark)], poll_interval=0.01))
+    errors = [r for r in records if "error" in r]
+    assert len(records) == 3
+    assert [r["i"] for r in errors] == [1]
+    assert errors[0]["error"] == "check: bad record"
+    assert sorted(later) == [0, 2]
+
+
+def test_stop_event_is_shared_with_stages():
+    stop = threading.Event()
+    pipeline = Pipeline(({"i": i} for i in range(3)), [("noop", lambda r: r)], stop_event=stop)
+    assert pipeline.stop_event is stop
+    list(pipeline)
+    assert stop.is_set()
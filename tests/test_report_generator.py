@@ -0,0 +1,82 @@
+import io
+import os
+import re
+
+import fitz
+import pandas as pd
+
+from report_generator import ReportGenerator
+
+PAPER = (
+    "Title: A Study of Agents\n"
+    "Abstract: Agents were studied.\n"
+    "Methodology\nA simulation was run.\n"
+    "Conclusion and Future Work\nMore work is needed."
+)
+
+
+def page_texts(data):
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return [page.get_text() for page in doc]
+
+
+def footers(texts):
+    return [int(re.findall(r"Page (\d+)", text)[-1]) for text in texts]
+
+
+def make_survey(rows):
+    return pd.DataFrame([{
+        "Paper Title": f"Paper {i}",
+        "Abstract": "First sentence. Second sentence! Third one? " * 4,
+        "Result": "Good. Fine."
+    } for i in range(rows)])
+
+
+def test_render_ieee_pdf_returns_bytes_or_fills_buffer():
+    generator = ReportGenerator()
+    data = generator.render_ieee_pdf(PAPER)
+    assert isinstance(data, bytes) and data.startswith(b"%PDF")
+
+    buffer = io.BytesIO()
+    assert generator.render_ieee_pdf(PAPER, buffer=buffer) is buffer
+    assert buffer.getvalue().startswith(b"%PDF")
+
+
+def test_artifacts_are_named_by_content_or_session(tmp_path):
+    generator = ReportGenerator(artifact_dir=str(tmp_path))
+    first = generator.generate_ieee_format_doc(PAPER)
+    other = generator.generate_ieee_format_doc(PAPER + "\nDiscussion\nExtra.")
+    session = generator.generate_ieee_format_doc(PAPER, session_id="abc")
+    assert first != other
+    assert os.path.basename(session) == "summarized_research_paper_abc.pdf"
+    assert all(os.path.exists(path) for path in (first, other, session))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_parallel_survey_numbers_pages_and_entries_continuously():
+    df = make_survey(45)
+    generator = ReportGenerator(min_rows_per_group=10)
+    data = generator.generate_lit_survey_pdf(df, workers=3)
+    texts = page_texts(data)
+
+    assert footers(texts) == list(range(1, len(texts) + 1))
+    entries = [int(n) for n in re.findall(r"^(\d+)\. Paper \d+$", "\n".join(texts), flags=re.M)]
+    assert entries == list(range(1, 46))
+    assert "\n".join(texts).count("Literature Survey Table") == 1
+
+
+def test_parallel_survey_keeps_small_groups_together():
+    generator = ReportGenerator(min_rows_per_group=10)
+    serial = generator.generate_lit_survey_pdf(make_survey(11))
+    parallel = generator.generate_lit_survey_pdf(make_survey(11), workers=4)
+    assert page_texts(serial) == page_texts(parallel)
+
+
+def test_batch_continues_table_and_page_numbering():
+    table = pd.DataFrame({"Model": ["A", "B"], "Score": [0.9, 0.8]})
+    papers = [{"text": PAPER, "tables": {"Methodology": table}} for _ in range(3)]
+    data = ReportGenerator().render_ieee_batch(papers, workers=3)
+    texts = page_texts(data)
+
+    assert footers(texts) == list(range(1, len(texts) + 1))
+    assert re.findall(r"Table (\d+)", "\n".join(texts)) == ["1", "2", "3"]
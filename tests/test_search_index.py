@@ -0,0 +1,76 @@
+import os
+import threading
+
+import fitz
+
+from search_index import PaperIndex
+
+
+def write_pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+
+def test_sync_only_reindexes_changed_files(tmp_path, monkeypatch):
+    write_pdf(tmp_path / "a.pdf", "graph neural networks")
+    write_pdf(tmp_path / "b.pdf", "protein folding")
+    index = PaperIndex(str(tmp_path))
+    assert index.sync() == 2
+
+    extracted = []
+    extract = index._extract_text
+    monkeypatch.setattr(index, "_extract_text", lambda path: extracted.append(path) or extract(path))
+    assert index.sync() == 0
+    assert extracted == []
+
+    write_pdf(tmp_path / "b.pdf", "protein folding with diffusion models")
+    os.utime(tmp_path / "b.pdf", (1, 1))
+    assert index.sync() == 1
+    assert [os.path.basename(p) for p in extracted] == ["b.pdf"]
+    assert [r["title"] for r in index.search("diffusion")] == ["b"]
+
+    os.remove(tmp_path / "a.pdf")
+    index.sync()
+    assert index.count() == 1
+
+
+def test_search_ranks_title_matches_first_and_quotes_input(tmp_path):
+    write_pdf(tmp_path / "body.pdf", "this body mentions transformers once")
+    write_pdf(tmp_path / "title.pdf", "unrelated text")
+    index = PaperIndex(str(tmp_path))
+    index.add_pdf(str(tmp_path / "body.pdf"), title="Graph methods")
+    index.add_pdf(str(tmp_path / "title.pdf"), title="Transformers for vision")
+
+    assert [r["title"] for r in index.search("transformers")] == ["Transformers for vision", "Graph methods"]
+    # FTS5 operators and stray quotes are searched as plain text.
+    assert index.search('transformers" OR (NEAR') == []
+    assert index.search('"') == []
+    assert index.search("   ") == []
+
+
+def test_concurrent_indexes_add_the_same_file_once(tmp_path):
+    write_pdf(tmp_path / "paper.pdf", "attention is all you need")
+    barrier = threading.Barrier(8)
+    ids, errors = [], []
+
+    def add(i):
+        # A fresh instance per thread, as on each Streamlit rerun.
+        index = PaperIndex(str(tmp_path))
+        barrier.wait()
+        try:
+            ids.append(index.add_pdf(str(tmp_path / "paper.pdf"), summary=f"summary {i}"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(set(ids)) == 1 and None not in ids
+    index = PaperIndex(str(tmp_path))
+    assert index.count() == 1
+    assert len(index.search("attention")) == 1
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from singleflight import SingleFlight, FlightCancelled
+
+
+def test_instant_calls_do_not_deadlock():
+    flight = SingleFlight()
+    done = threading.Event()
+
+    def run():
+        for i in range(2000):
+            assert flight.do(("k", i), lambda i=i: i) == i
+        done.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    assert done.wait(timeout=10), "SingleFlight.do hung on an instant-return function"
+    assert flight.inflight() == 0
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.3)
+        return 42
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [42] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_caller_does_not_stop_shared_work():
+    flight = SingleFlight(poll_interval=0.01)
+    cancel = threading.Event()
+    cancel.set()
+    future = flight.submit("k", lambda: time.sleep(0.2) or "done")
+    try:
+        flight.do("k", lambda: "other", cancel=cancel)
+        assert False, "expected FlightCancelled"
+    except FlightCancelled:
+        pass
+    assert future.result(timeout=5) == "done"
+
+
+def test_stream_fans_out_one_iteration_to_all_callers():
+    flight = SingleFlight(poll_interval=0.01)
+    started = []
+
+    def produce():
+        started.append(1)
+        for i in range(5):
+            time.sleep(0.05)
+            yield {"i": i}
+
+    results = [[] for _ in range(3)]
+
+    def consume(out):
+        for item in flight.stream("q", produce):
+            item["seen"] = True
+            out.append(item["i"])
+
+    threads = [threading.Thread(target=consume, args=(out,)) for out in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [[0, 1, 2, 3, 4]] * 3
+    assert len(started) == 1
+    assert flight.inflight() == 0
+
+
+def test_stream_propagates_source_errors():
+    flight = SingleFlight(poll_interval=0.01)
+
+    def produce():
+        yield 1
+        raise RuntimeError("source failed")
+
+    seen = []
+    try:
+        for item in flight.stream("bad", produce):
+            seen.append(item)
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert seen == [1]
+
+
+def test_stream_producer_waits_for_slowest_caller():
+    flight = SingleFlight(buffer_size=2, poll_interval=0.01)
+    produced = []
+
+    def produce():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    stream = flight.stream("slow", produce)
+    assert next(stream) == 0
+    time.sleep(0.2)
+    # One item handed out, at most buffer_size buffered, one blocked in append.
+    assert len(produced) <= 4
+    stream.close()
+    time.sleep(0.2)
+    assert len(produced) <= 4
+    assert flight.inflight() == 0
@@ -0,0 +1,34 @@
+from fpdf import FPDF
+
+from text_layout import TextLayout
+
+
+def make_layout():
+    pdf = FPDF('P', 'mm', 'A4')
+    pdf.add_page()
+    pdf.set_font("Arial", size=10)
+    return TextLayout(pdf)
+
+
+def test_overflowing_minimum_only_shrinks_wide_columns():
+    layout = make_layout()
+    url = "https://example.org/" + "a" * 200
+    header, cells = ["Value", "Link", "Score"], ["Value", url, "0.9"]
+    natural = [layout.natural_width(c) for c in cells]
+    minimum = [max(layout.longest_word(h), layout.longest_word(c)) for h, c in zip(header, cells)]
+    widths = layout.column_widths(natural, 180, minimum)
+
+    assert abs(sum(widths) - 180) < 1e-6
+    assert widths[0] >= minimum[0]
+    assert widths[2] >= minimum[2]
+    assert layout.wrap("Value", widths[0] - layout.padding()) == ["Value"]
+    assert layout.wrap("0.9", widths[2] - layout.padding()) == ["0.9"]
+    assert len(layout.wrap(url, widths[1] - layout.padding())) > 1
+
+
+def test_wrap_keeps_lines_within_width():
+    layout = make_layout()
+    text = "word " * 200
+    lines = layout.wrap(text, 50)
+    assert all(layout.pdf.get_string_width(line) <= 50 for line in lines)
+    assert " ".join(lines).split() == text.split()
@@ -0,0 +1,134 @@
+class TextLayout:
+    """
+    Word-width cache and linear-time line wrapping for an FPDF document.
+
+    Widths are cached per (family, style, size), shared across documents,
+    so repeated words and strings are only measured by fpdf once.
+    """
+
+    _cache = {}
+    max_cached_words = 50000
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+
+    def _widths(self):
+        key = (self.pdf.font_family, self.pdf.font_style.replace('U', ''), self.pdf.font_size_pt)
+        widths = self._cache.get(key)
+        if widths is None or len(widths) > self.max_cached_words:
+            widths = self._cache[key] = {}
+        return widths
+
+    def width(self, text, widths=None):
+        widths = widths if widths is not None else self._widths()
+        value = widths.get(text)
+        if value is None:
+            value = widths[text] = self.pdf.get_string_width(text)
+        return value
+
+    def padding(self):
+        """Horizontal padding fpdf adds on both sides of a cell."""
+        return 2 * getattr(self.pdf, 'c_margin', 0)
+
+    def _break_word(self, word, max_width, widths):
+        # A single word wider than the line is split on characters.
+        chunks, chunk, chunk_width = [], '', 0
+        for char in word:
+            char_width = self.width(char, widths)
+            if chunk and chunk_width + char_width > max_width:
+                chunks.append(chunk)
+                chunk, chunk_width = '', 0
+            chunk += char
+            chunk_width += char_width
+        chunks.append(chunk)
+        return chunks
+
+    def wrap(self, text, max_width):
+        """Splits text into lines no wider than max_width in the current font."""
+        widths = self._widths()
+        space = self.width(' ', widths)
+        lines = []
+        for paragraph in str(text).split('\n'):
+            line, line_width = [], 0
+            for word in paragraph.split():
+                word_width = self.width(word, widths)
+                if word_width > max_width:
+                    if line:
+                        lines.append(' '.join(line))
+                    *full, word = self._break_word(word, max_width, widths)
+                    lines.extend(full)
+                    word_width = self.width(word, widths)
+                    line, line_width = [word], word_width
+                elif line and line_width + space + word_width > max_width:
+                    lines.append(' '.join(line))
+                    line, line_width = [word], word_width
+                else:
+                    line_width += word_width + (space if line else 0)
+                    line.append(word)
+            lines.append(' '.join(line))
+        return lines
+
+    def natural_width(self, text):
+        """Widest explicit line of text, including cell padding."""
+        widths = self._widths()
+        space = self.width(' ', widths)
+        widest = 0
+        for paragraph in str(text).split('\n'):
+            words = paragraph.split()
+            line_width = sum(self.width(w, widths) for w in words) + space * max(len(words) - 1, 0)
+            widest = max(widest, line_width)
+        return widest + self.padding()
+
+    def longest_word(self, text):
+        widths = self._widths()
+        return max((self.width(w, widths) for w in str(text).split()), default=0) + self.padding()
+
+    def column_widths(self, natural, total_width, minimum=None):
+        """
+        Distributes total_width across columns. Columns that fit in an equal
+        share get exactly what they need; the remaining space goes to wider
+        columns in proportion to how much more they need.
+        """
+        count = len(natural)
+        if not count:
+            return []
+        minimum = minimum or [0] * count
+        fair = total_width / count
+        widths = [max(min(n, fair), m) for n, m in zip(natural, minimum)]
+        spare = total_width - sum(widths)
+        wants = [max(n - w, 0) for n, w in zip(natural, widths)]
+        total_want = sum(wants)
+        if spare > 0 and total_want > 0:
+            share = min(spare, total_want)
+            widths = [w + share * want / total_want for w, want in zip(widths, wants)]
+            spare -= share
+        if spare > 0:
+            widths = [w + spare / count for w in widths]
+        elif spare < 0:
+            # Minimum widths overflowed the page (e.g. a long URL). Cap only the
+            # widest columns at a common width so narrow ones keep their
+            # minimum; wrap() breaks the tokens that no longer fit.
+            cap = self._overflow_cap(widths, total_width)
+            widths = [min(w, cap) for w in widths]
+        return widths
+
+    def _overflow_cap(self, widths, total_width):
+        remaining = total_width
+        ordered = sorted(widths)
+        for i, w in enumerate(ordered):
+            share = remaining / (len(ordered) - i)
+            if w > share:
+                return share
+            remaining -= w
+        return ordered[-1]
+
+    def multi_cell(self, w, h, text, border=0, align='L'):
+        """Drop-in for FPDF.multi_cell using cached widths (no justification)."""
+        pdf = self.pdf
+        if w == 0:
+            w = pdf.w - pdf.r_margin - pdf.x
+        x = pdf.x
+        for line in self.wrap(text, w - self.padding()):
+            pdf.set_x(x)
+            pdf.cell(w, h, line, border=border, ln=2, align=align)
+        pdf.set_x(pdf.l_margin)